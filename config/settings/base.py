@@ -72,6 +72,7 @@ DJANGO_APPS = [
     # "django.contrib.sites",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # "django.contrib.humanize", # Handy template tags
     "unfold",
     "unfold.contrib.filters",
@@ -0,0 +1,15 @@
+# Generated manually for pg_trgm extension
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('instagram', '0037_historicalpost_view_count_historicaluser_view_count_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension()
+    ]
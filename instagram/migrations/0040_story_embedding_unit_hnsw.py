@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:56
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import instagram.models.story
+import pgvector.django.halfvec
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('instagram', '0039_user_search_trgm'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='story',
+            index=pgvector.django.indexes.HnswIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.comparison.Cast(instagram.models.story.L2Normalize('embedding'), pgvector.django.halfvec.HalfVectorField(dimensions=1536)), name='halfvec_ip_ops'), ef_construction=64, m=16, name='story_embedding_unit_hnsw'),
+        ),
+    ]
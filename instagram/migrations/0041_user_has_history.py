@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-15 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('instagram', '0040_story_embedding_unit_hnsw'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='has_history',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE instagram_user SET has_history = TRUE
+                WHERE EXISTS (
+                    SELECT 1 FROM instagram_historicaluser h
+                    WHERE h.uuid = instagram_user.uuid
+                )
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
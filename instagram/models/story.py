@@ -1,8 +1,13 @@
 import logging
 import uuid
 
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models import Func
+from django.db.models.functions import Cast
 from django.utils import timezone
+from pgvector.django import HalfVectorField
+from pgvector.django import HnswIndex
 from pgvector.django import VectorField
 
 from core.utils.openai import moderate_image_content
@@ -14,6 +19,22 @@ from instagram.models.mixins import ViewCountMixin
 logger = logging.getLogger(__name__)
 
 
+class L2Normalize(Func):
+    """pgvector's ``l2_normalize()``, scaling a vector to unit length."""
+
+    function = "l2_normalize"
+    output_field = VectorField()
+
+
+def unit_halfvec_embedding():
+    """
+    The story embedding scaled to unit length and cast to half precision.
+    The HNSW index covers this expression, and queries must order by it
+    exactly for the planner to use the index.
+    """
+    return Cast(L2Normalize("embedding"), HalfVectorField(dimensions=1536))
+
+
 class Story(InstagramModerationMixin, ViewCountMixin):
     story_id = models.CharField(unique=True, max_length=50, primary_key=True)
     user = models.ForeignKey("instagram.User", on_delete=models.CASCADE)
@@ -43,6 +64,17 @@ class Story(InstagramModerationMixin, ViewCountMixin):
     class Meta:
         verbose_name = "Story"
         verbose_name_plural = "Stories"
+        indexes = [
+            # Approximate nearest-neighbour index for similar-story lookups,
+            # built over unit-length half-precision copies so ranking is a
+            # single inner product and the index is half the size
+            HnswIndex(
+                OpClass(unit_halfvec_embedding(), name="halfvec_ip_ops"),
+                name="story_embedding_unit_hnsw",
+                m=16,
+                ef_construction=64,
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.story_id}"
@@ -1,7 +1,10 @@
 import logging
 import uuid
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 from simple_history.models import HistoricalRecords
 
@@ -166,7 +169,28 @@ class User(GetUserPostMixIn, ViewCountMixin):
         blank=True,
         null=True,
     )
-    history = HistoricalRecords()
+    # Whether any history records exist, kept current by the user signals so
+    # list views read a column instead of probing the history table per row
+    has_history = models.BooleanField(default=False, editable=False)
+    history = HistoricalRecords(excluded_fields=["has_history"])
+
+    class Meta:
+        indexes = [
+            # Trigram indexes serving the case-insensitive substring search
+            # (UPPER(col) LIKE UPPER('%q%')) behind the user, story and post lists
+            GinIndex(
+                OpClass(Upper("username"), name="gin_trgm_ops"),
+                name="user_username_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("full_name"), name="gin_trgm_ops"),
+                name="user_full_name_trgm",
+            ),
+            GinIndex(
+                OpClass(Upper("biography"), name="gin_trgm_ops"),
+                name="user_biography_trgm",
+            ),
+        ]
 
     def __str__(self):
         return self.username
@@ -1,11 +1,24 @@
 from rest_framework import serializers
 
 from instagram.models import Story
+from instagram.serializers.users import InstagramUserCompactSerializer
 from instagram.serializers.users import InstagramUserDetailSerializer
 from instagram.serializers.users import InstagramUserListSerializer
 
 
-class StoryListSerializer(serializers.ModelSerializer):
+class StoryUserFlagsMixin:
+    """
+    Set the has_stories flag read by the nested user serializer, which is
+    always True for a user reached through one of their stories, so story
+    views can join the user with select_related instead of annotating it.
+    """
+
+    def to_representation(self, instance):
+        instance.user.has_stories = True
+        return super().to_representation(instance)
+
+
+class StoryListSerializer(StoryUserFlagsMixin, serializers.ModelSerializer):
     user = InstagramUserListSerializer(read_only=True)
 
     class Meta:
@@ -22,7 +35,24 @@ class StoryListSerializer(serializers.ModelSerializer):
         ]
 
 
-class StoryDetailSerializer(serializers.ModelSerializer):
+class StoryListCompactSerializer(serializers.ModelSerializer):
+    user = InstagramUserCompactSerializer(read_only=True)
+
+    class Meta:
+        model = Story
+        fields = [
+            "story_id",
+            "user",
+            "thumbnail",
+            "blur_data_url",
+            "media",
+            "is_flagged",
+            "created_at",
+            "story_created_at",
+        ]
+
+
+class StoryDetailSerializer(StoryUserFlagsMixin, serializers.ModelSerializer):
     user = InstagramUserDetailSerializer(read_only=True)
 
     class Meta:
@@ -32,6 +32,12 @@ class InstagramUserListSerializer(ModelSerializer):
         exclude = ["original_profile_picture_url", "raw_api_data", "view_count"]
 
 
+class InstagramUserCompactSerializer(ModelSerializer):
+    class Meta:
+        model = InstagramUser
+        fields = ["uuid", "username", "profile_picture"]
+
+
 class InstagramUserDetailSerializer(ModelSerializer):
     has_stories = serializers.BooleanField(read_only=True)
     has_history = serializers.BooleanField(read_only=True)
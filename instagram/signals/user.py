@@ -3,6 +3,7 @@ import logging
 from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from simple_history.signals import post_create_historical_record
 
 from instagram.models import User
 from instagram.tasks.user import update_profile_picture_from_url
@@ -31,3 +32,11 @@ def user_post_save(sender, instance, created, **kwargs):
             )
 
         transaction.on_commit(queue_task)
+
+
+@receiver(post_create_historical_record, sender=User.history.model)
+def set_user_has_history(sender, instance, **kwargs):
+    """Mark the user as having history once a history record is created."""
+    if not instance.has_history:
+        instance.has_history = True
+        User.objects.filter(uuid=instance.uuid).update(has_history=True)
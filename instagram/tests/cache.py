@@ -0,0 +1,65 @@
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.base import BaseCache
+
+# Stores shared by every backend instance with the same name, like LocMemCache.
+_caches = {}
+
+
+class DictCache(BaseCache):
+    """
+    In-process cache backend for tests that inspect cached values.
+    Stores values by reference instead of pickling them like LocMemCache,
+    so large cached payloads cost nothing to write or read back. Callers
+    must not mutate what they put in or get out.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        self._store = _caches.setdefault(name, {})
+
+    def _get_entry(self, key):
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        expires_at = entry[1]
+        if expires_at is not None and expires_at <= time.time():
+            del self._store[key]
+            return None
+        return entry
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        if self._get_entry(key) is not None:
+            return False
+        self._store[key] = (value, self.get_backend_timeout(timeout))
+        return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        entry = self._get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store[key] = (value, self.get_backend_timeout(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        entry = self._get_entry(key)
+        if entry is None:
+            return False
+        self._store[key] = (entry[0], self.get_backend_timeout(timeout))
+        return True
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._store.pop(key, None) is not None
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._get_entry(key) is not None
+
+    def clear(self):
+        self._store.clear()
@@ -80,3 +80,22 @@ class PostMediaFactory(DjangoModelFactory):
 
     class Meta:
         model = PostMedia
+
+
+def cheap_user(i, **fields):
+    """
+    Build an unsaved Instagram User with fixed field values and no Faker calls.
+    Meant for bulk_create in tests that only need distinguishable users.
+    """
+    fields.setdefault("username", f"user{i}")
+    return InstagramUser(**fields)
+
+
+def cheap_story(user, i, **fields):
+    """
+    Build an unsaved Story for ``user`` with fixed field values and no Faker calls.
+    Meant for bulk_create in tests that only need stories to exist.
+    """
+    fields.setdefault("story_id", str(i))
+    fields.setdefault("story_created_at", timezone.now())
+    return Story(user=user, **fields)
@@ -4,6 +4,7 @@ from django.test import TestCase
 
 from instagram.models import PostMedia
 from instagram.models import Story
+from instagram.models import User
 from instagram.tests.factories import InstagramUserFactory
 from instagram.tests.factories import PostFactory
 from instagram.tests.factories import PostMediaFactory
@@ -30,6 +31,29 @@ class TestUserSignal(TestCase):
         mock_delay.assert_not_called()
 
 
+class TestUserHistorySignal(TestCase):
+    """Tests for the signals keeping User.has_history current."""
+
+    def test_has_history_set_when_history_created(self):
+        """Test that creating a user marks it as having history."""
+        user = InstagramUserFactory()
+
+        assert user.has_history is True
+        user.refresh_from_db()
+        assert user.has_history is True
+
+    def test_has_history_restored_by_stale_instance_save(self):
+        """Test that saving an instance with a stale flag keeps it True."""
+        user = InstagramUserFactory()
+        stale = User.objects.get(uuid=user.uuid)
+        User.objects.filter(uuid=user.uuid).update(has_history=False)
+        stale.has_history = False
+
+        stale.save()
+
+        assert User.objects.get(uuid=user.uuid).has_history is True
+
+
 class TestStorySignal(TestCase):
     """Tests for the story post_save signal (queue_story_media_download)."""
 
@@ -1,87 +1,154 @@
 import hashlib
+import itertools
 import json
+import math
 from unittest.mock import patch
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
 
 from django.core.cache import cache
 from django.test import TestCase
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
+from pgvector import Vector
 from rest_framework import status
+from rest_framework.response import Response
 from rest_framework.test import APIClient
+from rest_framework.test import APIRequestFactory
 
+from instagram.models import Story
+from instagram.models import User as InstagramUser
 from instagram.tests.factories import InstagramUserFactory
 from instagram.tests.factories import StoryFactory
+from instagram.tests.factories import cheap_story
+from instagram.tests.factories import cheap_user
+from instagram.views import StoryDetailView
+from instagram.views import StoryListView
+from instagram.views import StorySimilarView
+
+# Built once as packed float32 vectors rather than 1536-item lists of floats.
+_EMB = Vector([0.1, 0.2, 0.3] * 512)
+_EMB_ALT = Vector([0.5, 0.6, 0.7] * 512)
+
+# Story list tests that aren't about caching skip the response cache entirely.
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+# Cache tests keep payloads by reference instead of pickling them per access.
+DICT_CACHE = {"default": {"BACKEND": "instagram.tests.cache.DictCache"}}
+
+_story_ids = itertools.count(1)
+
+
+def _insert_user(i=0, **fields):
+    """Insert a user without firing post_save or writing a history record."""
+    [user] = InstagramUser.objects.bulk_create([cheap_user(i, **fields)])
+    return user
+
+
+def _bulk_stories(user, n, **kwargs):
+    """Insert ``n`` stories for ``user`` with a single multi-row INSERT.
+
+    Skips factory hooks and post_save signals, so only use it where the test
+    just needs rows to exist.
+    """
+    story_created_at = timezone.now()
+    stories = [
+        cheap_story(
+            user,
+            next(_story_ids),
+            story_created_at=story_created_at,
+            **kwargs,
+        )
+        for _ in range(n)
+    ]
+    return Story.objects.bulk_create(stories, batch_size=500)
 
 
-class StoryListViewTest(TestCase):
-    """Test suite for StoryListView endpoint."""
-
-    def setUp(self):
-        """Set up test client and common test data."""
-        cache.clear()
-        self.client = APIClient()
-        self.url = reverse("instagram:story_list")
-
-    def test_list_stories_success(self):
-        """Test successful retrieval of stories list."""
-        expected_count = 5
-        StoryFactory.create_batch(expected_count)
+def _json(response):
+    """Decode a response's rendered JSON body."""
+    return json.loads(response.content)
 
-        response = self.client.get(self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        assert "results" in response.data
-        assert len(response.data["results"]) == expected_count
+def _ok_results(response):
+    """Assert ``response`` is a 200 and return its decoded ``results`` list."""
+    assert response.status_code == status.HTTP_200_OK
+    return _json(response)["results"]
 
-    def test_list_stories_unauthenticated_allowed(self):
-        """Test unauthenticated access (IsAuthenticatedOrReadOnly)."""
-        StoryFactory.create_batch(3)
 
-        response = self.client.get(self.url)
+def _get_view(view_class, path, **kwargs):
+    """GET ``view_class`` directly, skipping URL resolution and middleware."""
+    response = view_class.as_view()(APIRequestFactory().get(path), **kwargs)
+    # DRF responses render lazily, cached story lists come back pre-rendered
+    if isinstance(response, Response):
+        response.render()
+    return response
 
-        assert response.status_code == status.HTTP_200_OK
 
-    def test_list_stories_pagination(self):
-        """Test that pagination works correctly with cursor pagination."""
-        # Create stories to test pagination
-        total_stories = 15
-        StoryFactory.create_batch(total_stories)
+def _extract_cursor(next_url):
+    """Return the cursor query param from a paginated ``next`` URL."""
+    return parse_qs(urlparse(next_url).query)["cursor"][0]
 
-        response = self.client.get(self.url)
 
+def _paginated_get(client, url, **params):
+    """Yield each decoded page of a cursor-paginated list until ``next`` is None."""
+    while True:
+        response = client.get(url, params)
         assert response.status_code == status.HTTP_200_OK
-        assert "results" in response.data
-        assert "next" in response.data
-        assert "previous" in response.data
-        assert len(response.data["results"]) == total_stories
-
-    def test_list_stories_with_page_size_param(self):
-        """Test custom page size parameter."""
-        custom_page_size = 5
-        StoryFactory.create_batch(10)
+        page = _json(response)
+        yield page
+        if page["next"] is None:
+            return
+        params["cursor"] = _extract_cursor(page["next"])
+
+
+class StoryListViewTestCase(TestCase):
+    """Shared client and URL for StoryListView tests."""
+
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        """Resolve the endpoint URL once for the class."""
+        cls.url = reverse("instagram:story_list")
+
+
+@override_settings(CACHES=NO_CACHE)
+class StoryListViewSharedDataTest(StoryListViewTestCase):
+    """Read-only StoryListView tests that list one shared set of stories."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create the stories once for every test in the class."""
+        super().setUpTestData()
+        cls.user = _insert_user(username="testuser")
+        [cls.unflagged_story] = _bulk_stories(cls.user, 1, is_flagged=False)
+        [cls.flagged_story] = _bulk_stories(cls.user, 1, is_flagged=True)
+        cls.stories = [
+            cls.unflagged_story,
+            cls.flagged_story,
+            *_bulk_stories(cls.user, 3),
+        ]
 
-        response = self.client.get(self.url, {"page_size": custom_page_size})
+    def test_list_stories_success(self):
+        """Test successful retrieval of stories list."""
+        response = self.client.get(self.url)
 
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == custom_page_size
-
-    def test_list_stories_max_page_size(self):
-        """Test that max page size is enforced (100)."""
-        max_page_size = 100
-        StoryFactory.create_batch(50)
+        data = _json(response)
+        assert "results" in data
+        assert len(data["results"]) == len(self.stories)
 
-        response = self.client.get(self.url, {"page_size": 200})
+    def test_list_stories_unauthenticated_allowed(self):
+        """Test unauthenticated access (IsAuthenticatedOrReadOnly)."""
+        response = self.client.get(self.url)
 
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) <= max_page_size
 
     def test_list_stories_ordering_default(self):
         """Test default ordering by created_at descending."""
-        StoryFactory.create_batch(5)
-
         response = self.client.get(self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
 
         # Most recent story should be first
         created_at_values = [story["created_at"] for story in results]
@@ -89,12 +156,9 @@ class StoryListViewTest(TestCase):
 
     def test_response_structure(self):
         """Test that the response contains expected fields."""
-        StoryFactory()
-
-        response = self.client.get(self.url)
+        response = _get_view(StoryListView, self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
         assert len(results) > 0
 
         first_story = results[0]
@@ -114,33 +178,23 @@ class StoryListViewTest(TestCase):
 
     def test_is_flagged_false_by_default(self):
         """Test that is_flagged defaults to False for new stories."""
-        StoryFactory(is_flagged=False)
-
         response = self.client.get(self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        first_story = response.data["results"][0]
-        assert first_story["is_flagged"] is False
+        stories = {story["story_id"]: story for story in _ok_results(response)}
+        assert stories[self.unflagged_story.story_id]["is_flagged"] is False
 
     def test_is_flagged_true_for_flagged_story(self):
         """Test that is_flagged is True for flagged stories."""
-        StoryFactory(is_flagged=True)
-
         response = self.client.get(self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        first_story = response.data["results"][0]
-        assert first_story["is_flagged"] is True
+        stories = {story["story_id"]: story for story in _ok_results(response)}
+        assert stories[self.flagged_story.story_id]["is_flagged"] is True
 
     def test_nested_user_structure(self):
         """Test that nested user object contains expected fields."""
-        user = InstagramUserFactory(username="testuser")
-        StoryFactory(user=user)
-
-        response = self.client.get(self.url)
+        response = _get_view(StoryListView, self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
         assert len(results) > 0
 
         first_story = results[0]
@@ -170,20 +224,92 @@ class StoryListViewTest(TestCase):
         for field in expected_user_fields:
             assert field in user_data, f"Field '{field}' missing from user data"
 
+    def test_compact_user_structure(self):
+        """Test that compact=true trims the nested user to three fields."""
+        response = self.client.get(self.url, {"compact": "true"})
+
+        results = _ok_results(response)
+        assert {story["story_id"] for story in results} == {
+            story.story_id for story in self.stories
+        }
+        for story in results:
+            assert set(story["user"]) == {"uuid", "username", "profile_picture"}
+            assert story["user"]["uuid"] == str(self.user.uuid)
+
+    def test_compact_false_returns_full_user(self):
+        """Test that compact=false keeps the full nested user."""
+        response = self.client.get(self.url, {"compact": "false"})
+
+        results = _ok_results(response)
+        assert "has_history" in results[0]["user"]
+
     def test_user_has_stories_annotation(self):
         """Test that user's has_stories annotation is correct."""
-        user = InstagramUserFactory(username="storyuser")
-        StoryFactory(user=user)
-
         response = self.client.get(self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
         assert len(results) > 0
 
         first_story = results[0]
         assert first_story["user"]["has_stories"] is True
 
+    def test_user_without_history_annotation(self):
+        """Test that has_history is False for a user with no history records."""
+        # The shared user is bulk-inserted, which skips simple-history
+        results = _ok_results(self.client.get(self.url))
+
+        assert {story["user"]["has_history"] for story in results} == {False}
+
+    def test_story_with_same_user_multiple_times(self):
+        """Test that the same user appears correctly in multiple stories."""
+        response = self.client.get(self.url)
+
+        results = _ok_results(response)
+        assert len(results) == len(self.stories)
+
+        # All stories should have the same user
+        for story in results:
+            assert story["user"]["username"] == "testuser"
+            assert story["user"]["uuid"] == str(self.user.uuid)
+
+
+@override_settings(CACHES=NO_CACHE)
+class StoryListViewTest(StoryListViewTestCase):
+    """Test suite for StoryListView endpoint."""
+
+    def test_list_stories_pagination(self):
+        """Test that pagination works correctly with cursor pagination."""
+        # Create stories to test pagination
+        total_stories = 15
+        _bulk_stories(_insert_user(username="pageuser"), total_stories)
+
+        response = self.client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = _json(response)
+        assert "results" in data
+        assert "next" in data
+        assert "previous" in data
+        assert len(data["results"]) == total_stories
+
+    def test_list_stories_with_page_size_param(self):
+        """Test custom page size parameter."""
+        custom_page_size = 5
+        _bulk_stories(_insert_user(username="pageuser"), 10)
+
+        response = self.client.get(self.url, {"page_size": custom_page_size})
+
+        assert len(_ok_results(response)) == custom_page_size
+
+    def test_list_stories_max_page_size(self):
+        """Test that max page size is enforced (100)."""
+        max_page_size = 100
+        _bulk_stories(_insert_user(username="pageuser"), 50)
+
+        response = self.client.get(self.url, {"page_size": 200})
+
+        assert len(_ok_results(response)) <= max_page_size
+
     def test_user_has_history_annotation(self):
         """Test that user's has_history annotation is correct."""
         user = InstagramUserFactory(username="historyuser", full_name="Original Name")
@@ -194,8 +320,7 @@ class StoryListViewTest(TestCase):
 
         response = self.client.get(self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
         assert len(results) > 0
 
         first_story = results[0]
@@ -206,50 +331,31 @@ class StoryListViewTest(TestCase):
         response = self.client.get(self.url)
 
         assert response.status_code == status.HTTP_200_OK
-        assert "results" in response.data
-        assert len(response.data["results"]) == 0
+        data = _json(response)
+        assert "results" in data
+        assert len(data["results"]) == 0
 
     def test_cursor_pagination_next_page(self):
         """Test navigating to the next page using cursor pagination."""
         page_size = 10
-        StoryFactory.create_batch(15)
+        _bulk_stories(_insert_user(username="pageuser"), 15)
 
-        # Get first page
-        response = self.client.get(self.url, {"page_size": page_size})
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == page_size
-        assert response.data["next"] is not None
+        pages = list(_paginated_get(self.client, self.url, page_size=page_size))
 
-        # Extract cursor from next URL
-        next_url = response.data["next"]
-        cursor_start = next_url.find("cursor=") + 7
-        cursor_end = next_url.find("&", cursor_start)
-        if cursor_end == -1:
-            cursor = next_url[cursor_start:]
-        else:
-            cursor = next_url[cursor_start:cursor_end]
-
-        # Get second page
-        response = self.client.get(
-            self.url,
-            {"page_size": page_size, "cursor": cursor},
-        )
-        assert response.status_code == status.HTTP_200_OK
         # Second page should have remaining 5 stories (15 total - 10 from first page)
-        assert len(response.data["results"]) == 5  # noqa: PLR2004
+        assert [len(page["results"]) for page in pages] == [page_size, 5]
 
     def test_stories_from_multiple_users(self):
         """Test that stories from multiple users are returned correctly."""
-        user1 = InstagramUserFactory(username="user1")
-        user2 = InstagramUserFactory(username="user2")
+        user1 = _insert_user(username="user1")
+        user2 = _insert_user(username="user2")
 
-        StoryFactory.create_batch(3, user=user1)
-        StoryFactory.create_batch(2, user=user2)
+        _bulk_stories(user1, 3)
+        _bulk_stories(user2, 2)
 
         response = self.client.get(self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
         assert len(results) == 5  # noqa: PLR2004
 
         # Verify we have stories from both users
@@ -257,135 +363,46 @@ class StoryListViewTest(TestCase):
         assert "user1" in usernames
         assert "user2" in usernames
 
-    def test_story_with_same_user_multiple_times(self):
-        """Test that the same user appears correctly in multiple stories."""
-        user = InstagramUserFactory(username="multiuser")
-        StoryFactory.create_batch(3, user=user)
-
-        response = self.client.get(self.url)
-
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
-        assert len(results) == 3  # noqa: PLR2004
-
-        # All stories should have the same user
-        for story in results:
-            assert story["user"]["username"] == "multiuser"
-            assert story["user"]["uuid"] == str(user.uuid)
-
-    def test_search_by_username(self):
-        """Test searching stories by user's username."""
-        user1 = InstagramUserFactory(username="johndoe")
-        user2 = InstagramUserFactory(username="janedoe")
-        user3 = InstagramUserFactory(username="alice")
-
-        StoryFactory.create_batch(2, user=user1)
-        StoryFactory.create_batch(2, user=user2)
-        StoryFactory.create_batch(1, user=user3)
+    def test_query_count_does_not_grow_with_users(self):
+        """Test that stories and their annotated users load in fixed queries."""
+        for i in range(5):
+            _bulk_stories(_insert_user(username=f"user{i}"), 2)
 
-        response = self.client.get(self.url, {"search": "doe"})
-
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
-        assert len(results) == 4  # noqa: PLR2004
-
-        # All results should be from users with "doe" in username
-        usernames = {story["user"]["username"] for story in results}
-        assert usernames == {"johndoe", "janedoe"}
-
-    def test_search_by_full_name(self):
-        """Test searching stories by user's full name."""
-        user1 = InstagramUserFactory(username="user1", full_name="John Smith")
-        user2 = InstagramUserFactory(username="user2", full_name="Jane Smith")
-        user3 = InstagramUserFactory(username="user3", full_name="Bob Johnson")
-
-        StoryFactory.create_batch(2, user=user1)
-        StoryFactory.create_batch(2, user=user2)
-        StoryFactory.create_batch(1, user=user3)
-
-        response = self.client.get(self.url, {"search": "Smith"})
-
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
-        assert len(results) == 4  # noqa: PLR2004
+        # Page of stories joined with their users, inside the request's savepoint
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
 
-        # All results should be from users with "Smith" in full_name
-        full_names = {story["user"]["full_name"] for story in results}
-        assert full_names == {"John Smith", "Jane Smith"}
-
-    def test_search_by_biography(self):
-        """Test searching stories by user's biography."""
-        user1 = InstagramUserFactory(
-            username="user1",
-            biography="I love photography and travel",
-        )
-        user2 = InstagramUserFactory(
-            username="user2",
-            biography="Photography enthusiast",
-        )
-        user3 = InstagramUserFactory(username="user3", biography="Food blogger")
-
-        StoryFactory.create_batch(2, user=user1)
-        StoryFactory.create_batch(2, user=user2)
-        StoryFactory.create_batch(1, user=user3)
-
-        response = self.client.get(self.url, {"search": "photography"})
-
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
-        assert len(results) == 4  # noqa: PLR2004
-
-        # All results should be from users with "photography" in biography
-        usernames = {story["user"]["username"] for story in results}
-        assert usernames == {"user1", "user2"}
-
-    def test_search_case_insensitive(self):
-        """Test that search is case-insensitive."""
-        user = InstagramUserFactory(username="TestUser", full_name="Test User")
-        StoryFactory.create_batch(2, user=user)
-
-        # Test with lowercase
-        response = self.client.get(self.url, {"search": "testuser"})
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 2  # noqa: PLR2004
-
-        # Test with uppercase
-        response = self.client.get(self.url, {"search": "TESTUSER"})
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 2  # noqa: PLR2004
+        assert len(_ok_results(response)) == 10  # noqa: PLR2004
 
     def test_search_no_results(self):
         """Test search with no matching results."""
-        user = InstagramUserFactory(username="testuser")
-        StoryFactory.create_batch(2, user=user)
+        user = _insert_user(username="testuser")
+        _bulk_stories(user, 2)
 
         response = self.client.get(self.url, {"search": "nonexistent"})
 
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 0
+        assert len(_ok_results(response)) == 0
 
     def test_search_partial_match(self):
         """Test that search works with partial matches."""
-        user = InstagramUserFactory(username="photography_lover")
-        StoryFactory.create_batch(2, user=user)
+        user = _insert_user(username="photography_lover")
+        _bulk_stories(user, 2)
 
         response = self.client.get(self.url, {"search": "photo"})
 
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 2  # noqa: PLR2004
+        assert len(_ok_results(response)) == 2  # noqa: PLR2004
 
     def test_filter_by_user(self):
         """Test filtering stories by specific user."""
-        user1 = InstagramUserFactory(username="user1")
-        user2 = InstagramUserFactory(username="user2")
+        user1 = _insert_user(username="user1")
+        user2 = _insert_user(username="user2")
 
-        StoryFactory.create_batch(3, user=user1)
-        StoryFactory.create_batch(2, user=user2)
+        _bulk_stories(user1, 3)
+        _bulk_stories(user2, 2)
 
         response = self.client.get(self.url, {"user": str(user1.uuid)})
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
         assert len(results) == 3  # noqa: PLR2004
 
         # All results should be from user1
@@ -395,19 +412,18 @@ class StoryListViewTest(TestCase):
 
     def test_filter_by_user_no_stories(self):
         """Test filtering by user who has no stories."""
-        user1 = InstagramUserFactory(username="user1")
-        user2 = InstagramUserFactory(username="user2")
+        user1 = _insert_user(username="user1")
+        user2 = _insert_user(username="user2")
 
-        StoryFactory.create_batch(3, user=user1)
+        _bulk_stories(user1, 3)
 
         response = self.client.get(self.url, {"user": str(user2.uuid)})
 
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 0
+        assert len(_ok_results(response)) == 0
 
     def test_filter_by_invalid_user_uuid(self):
         """Test filtering with invalid user UUID."""
-        StoryFactory.create_batch(2)
+        _bulk_stories(_insert_user(username="storyuser"), 2)
 
         response = self.client.get(self.url, {"user": "invalid-uuid"})
 
@@ -417,13 +433,13 @@ class StoryListViewTest(TestCase):
 
     def test_combined_search_and_filter(self):
         """Test using search and filter together."""
-        user1 = InstagramUserFactory(username="johndoe", full_name="John Doe")
-        user2 = InstagramUserFactory(username="janedoe", full_name="Jane Doe")
-        user3 = InstagramUserFactory(username="bobsmith", full_name="Bob Smith")
+        user1 = _insert_user(username="johndoe", full_name="John Doe")
+        user2 = _insert_user(username="janedoe", full_name="Jane Doe")
+        user3 = _insert_user(username="bobsmith", full_name="Bob Smith")
 
-        StoryFactory.create_batch(2, user=user1)
-        StoryFactory.create_batch(2, user=user2)
-        StoryFactory.create_batch(1, user=user3)
+        _bulk_stories(user1, 2)
+        _bulk_stories(user2, 2)
+        _bulk_stories(user3, 1)
 
         # Search for "doe" and filter by user1
         response = self.client.get(
@@ -431,8 +447,7 @@ class StoryListViewTest(TestCase):
             {"search": "doe", "user": str(user1.uuid)},
         )
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
         assert len(results) == 2  # noqa: PLR2004
 
         # All results should be from user1 and match "doe"
@@ -442,41 +457,108 @@ class StoryListViewTest(TestCase):
 
     def test_search_with_pagination(self):
         """Test search functionality works with pagination."""
-        user = InstagramUserFactory(username="searchuser")
-        StoryFactory.create_batch(15, user=user)
+        user = _insert_user(username="searchuser")
+        _bulk_stories(user, 15)
 
-        response = self.client.get(self.url, {"search": "searchuser", "page_size": 10})
+        pages = list(
+            _paginated_get(self.client, self.url, search="searchuser", page_size=10),
+        )
 
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 10  # noqa: PLR2004
-        assert response.data["next"] is not None
+        assert [len(page["results"]) for page in pages] == [10, 5]
 
     def test_filter_with_pagination(self):
         """Test filter functionality works with pagination."""
-        user = InstagramUserFactory(username="filteruser")
-        StoryFactory.create_batch(15, user=user)
+        user = _insert_user(username="filteruser")
+        _bulk_stories(user, 15)
 
-        response = self.client.get(
-            self.url,
-            {"user": str(user.uuid), "page_size": 10},
+        pages = list(
+            _paginated_get(self.client, self.url, user=str(user.uuid), page_size=10),
         )
 
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 10  # noqa: PLR2004
-        assert response.data["next"] is not None
+        assert [len(page["results"]) for page in pages] == [10, 5]
+
+
+@override_settings(CACHES=NO_CACHE)
+class StoryListViewSearchTest(StoryListViewTestCase):
+    """Search tests that run every term against one shared set of stories."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create two stories per searchable user and one per distractor."""
+        super().setUpTestData()
+        searchable_users = [
+            _insert_user(username="johndoe"),
+            _insert_user(username="janedoe"),
+            _insert_user(username="user1", full_name="John Smith"),
+            _insert_user(username="user2", full_name="Jane Smith"),
+            _insert_user(username="user3", biography="I love photography and travel"),
+            _insert_user(username="user4", biography="Photography enthusiast"),
+            _insert_user(username="TestUser", full_name="Test User"),
+        ]
+        distractor_users = [
+            _insert_user(username="alice"),
+            _insert_user(username="user5", full_name="Bob Johnson"),
+            _insert_user(username="user6", biography="Food blogger"),
+        ]
+        for user in searchable_users:
+            _bulk_stories(user, 2)
+        for user in distractor_users:
+            _bulk_stories(user, 1)
+
+    def test_search(self):
+        """Test searching by username, full name and biography, ignoring case."""
+        cases = [
+            ("doe", {"johndoe", "janedoe"}),  # username
+            ("Smith", {"user1", "user2"}),  # full name
+            ("photography", {"user3", "user4"}),  # biography
+            ("testuser", {"TestUser"}),  # lowercase
+            ("TESTUSER", {"TestUser"}),  # uppercase
+        ]
+
+        for search, expected_usernames in cases:
+            with self.subTest(search=search):
+                response = self.client.get(self.url, {"search": search})
+
+                results = _ok_results(response)
+                assert len(results) == 2 * len(expected_usernames)
+
+                # All results should be from the users matching the term
+                usernames = {story["user"]["username"] for story in results}
+                assert usernames == expected_usernames
+
 
-    def _make_cache_key(self, params: dict) -> str:
+@override_settings(CACHES=DICT_CACHE)
+class StoryListViewCacheTest(StoryListViewTestCase):
+    """Test suite for StoryListView's per-query-param response cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Resolve the URL and the unfiltered list cache key once."""
+        super().setUpTestData()
+        cls.default_cache_key = cls._make_cache_key("")
+
+    def setUp(self):
+        """Drop the unfiltered list page cached by an earlier test."""
+        cache.delete(self.default_cache_key)
+
+    @staticmethod
+    def _make_cache_key(query_string: str) -> str:
         """Helper to replicate the cache key logic from StoryListView."""
-        params_key = json.dumps(sorted(params.items()), sort_keys=True)
-        md5_hash = hashlib.md5(params_key.encode(), usedforsecurity=False).hexdigest()
-        return "story_list_" + md5_hash
+        params_key = "&".join(
+            sorted(query_string.split("&"), key=lambda pair: pair.partition("=")[0]),
+        )
+        digest = hashlib.blake2b(
+            params_key.encode(),
+            digest_size=12,
+            usedforsecurity=False,
+        ).hexdigest()
+        return "story_list_json_" + digest
 
     def test_cache_miss_on_first_request(self):
         """Test that first request doesn't find cache and creates it."""
-        cache.clear()
-        StoryFactory.create_batch(3)
+        _bulk_stories(_insert_user(username="storyuser"), 3)
 
-        cache_key = self._make_cache_key({})
+        cache_key = self.default_cache_key
         assert cache.get(cache_key) is None
 
         response = self.client.get(self.url)
@@ -487,26 +569,24 @@ class StoryListViewTest(TestCase):
 
     def test_cache_hit_on_second_request(self):
         """Test that second request to same URL uses cache."""
-        cache.clear()
-        StoryFactory.create_batch(3)
+        _bulk_stories(_insert_user(username="storyuser"), 3)
 
         response1 = self.client.get(self.url)
         assert response1.status_code == status.HTTP_200_OK
 
-        cache_key = self._make_cache_key({})
+        cache_key = self.default_cache_key
         assert cache.get(cache_key) is not None
 
         response2 = self.client.get(self.url)
         assert response2.status_code == status.HTTP_200_OK
 
-        assert response1.data == response2.data
+        assert response1.content == response2.content
 
     def test_cache_expires_after_ttl(self):
         """Test that cache is regenerated after manual expiration."""
-        cache.clear()
-        StoryFactory.create_batch(3)
+        _bulk_stories(_insert_user(username="storyuser"), 3)
 
-        cache_key = self._make_cache_key({})
+        cache_key = self.default_cache_key
 
         response1 = self.client.get(self.url)
         assert response1.status_code == status.HTTP_200_OK
@@ -521,11 +601,10 @@ class StoryListViewTest(TestCase):
 
     def test_different_query_params_have_different_cache_keys(self):
         """Test that different query params produce separate cache entries."""
-        cache.clear()
-        user1 = InstagramUserFactory(username="cacheuser1")
-        user2 = InstagramUserFactory(username="cacheuser2")
-        StoryFactory.create_batch(2, user=user1)
-        StoryFactory.create_batch(2, user=user2)
+        user1 = _insert_user(username="cacheuser1")
+        user2 = _insert_user(username="cacheuser2")
+        _bulk_stories(user1, 2)
+        _bulk_stories(user2, 2)
 
         response_all = self.client.get(self.url)
         response_user1 = self.client.get(self.url, {"user": str(user1.uuid)})
@@ -533,44 +612,93 @@ class StoryListViewTest(TestCase):
         assert response_all.status_code == status.HTTP_200_OK
         assert response_user1.status_code == status.HTTP_200_OK
 
-        cache_key_all = self._make_cache_key({})
-        cache_key_user1 = self._make_cache_key({"user": [str(user1.uuid)]})
+        cache_key_all = self.default_cache_key
+        cache_key_user1 = self._make_cache_key(f"user={user1.uuid}")
 
         assert cache_key_all != cache_key_user1
         assert cache.get(cache_key_all) is not None
         assert cache.get(cache_key_user1) is not None
 
         # Filtered response should have fewer results than unfiltered
-        assert len(response_user1.data["results"]) < len(response_all.data["results"])
+        user1_results = _json(response_user1)["results"]
+        assert len(user1_results) < len(_json(response_all)["results"])
 
     def test_cache_contains_correct_data(self):
-        """Test that cached data matches the actual response."""
-        cache.clear()
-        user = InstagramUserFactory(username="cachedatauser")
-        StoryFactory.create_batch(2, user=user)
+        """Test that the cached JSON is exactly the response body."""
+        user = _insert_user(username="cachedatauser")
+        _bulk_stories(user, 2)
 
-        cache_key = self._make_cache_key({})
+        cache_key = self.default_cache_key
 
         response = self.client.get(self.url)
         assert response.status_code == status.HTTP_200_OK
 
-        cached_data = cache.get(cache_key)
-        assert cached_data is not None
-        assert cached_data["results"] == list(response.data["results"])
+        assert cache.get(cache_key) == response.content
+
+    def test_query_param_order_shares_cache_key(self):
+        """Test that reordered query params hit the same cache entry."""
+        user = _insert_user(username="cacheuser")
+        _bulk_stories(user, 3)
+
+        response1 = self.client.get(f"{self.url}?user={user.uuid}&page_size=2")
+        cache_key = self._make_cache_key(f"page_size=2&user={user.uuid}")
+        assert cache.get(cache_key) == response1.content
+
+        response2 = self.client.get(f"{self.url}?page_size=2&user={user.uuid}")
+        assert response2.content == response1.content
+
+    def test_repeated_param_order_has_different_cache_keys(self):
+        """Test that reordered values of a repeated param are cached apart."""
+        _bulk_stories(_insert_user(username="alpha"), 1)
+        _bulk_stories(_insert_user(username="beta"), 1)
+
+        # SearchFilter reads the last value, so these are different queries
+        response1 = self.client.get(f"{self.url}?search=alpha&search=beta")
+        response2 = self.client.get(f"{self.url}?search=beta&search=alpha")
+
+        assert self._make_cache_key("search=alpha&search=beta") != (
+            self._make_cache_key("search=beta&search=alpha")
+        )
+        assert _json(response1)["results"][0]["user"]["username"] == "beta"
+        assert _json(response2)["results"][0]["user"]["username"] == "alpha"
+
+    def test_cache_hit_served_as_json(self):
+        """Test that a cached list is returned as a JSON response."""
+        _bulk_stories(_insert_user(username="storyuser"), 2)
+        self.client.get(self.url)
+
+        response = self.client.get(self.url)
+
+        assert response["Content-Type"] == "application/json"
+        assert len(_ok_results(response)) == 2  # noqa: PLR2004
+
+    def test_browsable_api_not_cached(self):
+        """Test that only JSON responses are cached."""
+        _bulk_stories(_insert_user(username="storyuser"), 2)
+
+        response = self.client.get(self.url, HTTP_ACCEPT="text/html")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert cache.get(self.default_cache_key) is None
 
 
 class StoryDetailViewTest(TestCase):
     """Test suite for StoryDetailView endpoint."""
 
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        """Insert the user that owns the stories of tests not about history."""
+        cls.user = _insert_user()
+
     def setUp(self):
-        """Set up test client and common test data."""
+        """Reset view-count dedup state between tests."""
         cache.clear()
-        self.client = APIClient()
 
     def test_retrieve_story_success(self):
         """Test successful retrieval of a single story."""
-        user = InstagramUserFactory(username="testuser")
-        story = StoryFactory(user=user)
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         response = self.client.get(url)
@@ -590,7 +718,7 @@ class StoryDetailViewTest(TestCase):
 
     def test_retrieve_story_unauthenticated_allowed(self):
         """Test unauthenticated access (IsAuthenticatedOrReadOnly)."""
-        story = StoryFactory()
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         response = self.client.get(url)
@@ -599,10 +727,10 @@ class StoryDetailViewTest(TestCase):
 
     def test_response_structure(self):
         """Test that the response contains expected fields."""
-        story = StoryFactory()
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
-        response = self.client.get(url)
+        response = _get_view(StoryDetailView, url, story_id=story.story_id)
 
         assert response.status_code == status.HTTP_200_OK
 
@@ -622,7 +750,7 @@ class StoryDetailViewTest(TestCase):
 
     def test_is_flagged_false_by_default(self):
         """Test that is_flagged defaults to False for new stories."""
-        story = StoryFactory(is_flagged=False)
+        [story] = _bulk_stories(self.user, 1, is_flagged=False)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         response = self.client.get(url)
@@ -632,7 +760,7 @@ class StoryDetailViewTest(TestCase):
 
     def test_is_flagged_true_for_flagged_story(self):
         """Test that is_flagged is True for flagged stories."""
-        story = StoryFactory(is_flagged=True)
+        [story] = _bulk_stories(self.user, 1, is_flagged=True)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         response = self.client.get(url)
@@ -642,11 +770,10 @@ class StoryDetailViewTest(TestCase):
 
     def test_nested_user_detail_structure(self):
         """Test that nested user object contains detailed fields."""
-        user = InstagramUserFactory(username="detailuser")
-        story = StoryFactory(user=user)
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
-        response = self.client.get(url)
+        response = _get_view(StoryDetailView, url, story_id=story.story_id)
 
         assert response.status_code == status.HTTP_200_OK
         user_data = response.data["user"]
@@ -679,8 +806,7 @@ class StoryDetailViewTest(TestCase):
 
     def test_user_has_stories_annotation(self):
         """Test that user's has_stories annotation is correct."""
-        user = InstagramUserFactory(username="storyuser")
-        story = StoryFactory(user=user)
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         response = self.client.get(url)
@@ -719,7 +845,7 @@ class StoryDetailViewTest(TestCase):
 
     def test_story_id_field_matches(self):
         """Test that story_id in response matches the requested story."""
-        story = StoryFactory()
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         response = self.client.get(url)
@@ -729,18 +855,17 @@ class StoryDetailViewTest(TestCase):
 
     def test_user_uuid_field_matches(self):
         """Test that user UUID in response matches the story's user."""
-        user = InstagramUserFactory()
-        story = StoryFactory(user=user)
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         response = self.client.get(url)
 
         assert response.status_code == status.HTTP_200_OK
-        assert response.data["user"]["uuid"] == str(user.uuid)
+        assert response.data["user"]["uuid"] == str(self.user.uuid)
 
     def test_view_count_not_in_response(self):
         """Test that view_count is never exposed via the API."""
-        story = StoryFactory()
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         response = self.client.get(url)
@@ -750,7 +875,7 @@ class StoryDetailViewTest(TestCase):
 
     @patch("instagram.views.stories.increment_story_view_count.delay")
     def test_first_view_triggers_increment_task(self, mock_delay):
-        story = StoryFactory()
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         self.client.get(url)
@@ -759,7 +884,7 @@ class StoryDetailViewTest(TestCase):
 
     @patch("instagram.views.stories.increment_story_view_count.delay")
     def test_repeat_view_same_ip_does_not_trigger_again(self, mock_delay):
-        story = StoryFactory()
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         self.client.get(url)
@@ -769,7 +894,7 @@ class StoryDetailViewTest(TestCase):
 
     @patch("instagram.views.stories.increment_story_view_count.delay")
     def test_view_from_different_ip_triggers_again(self, mock_delay):
-        story = StoryFactory()
+        [story] = _bulk_stories(self.user, 1)
 
         url = reverse("instagram:story_detail", kwargs={"story_id": story.story_id})
         self.client.get(url, REMOTE_ADDR="1.1.1.1")
@@ -794,167 +919,121 @@ class StoryDetailViewTest(TestCase):
 class StorySimilarViewTest(TestCase):
     """Test suite for StorySimilarView endpoint."""
 
-    def setUp(self):
-        """Set up test client and common test data."""
-        self.client = APIClient()
-
-    def test_similar_stories_success(self):
-        """Test successful retrieval of similar stories ordered by similarity."""
-        user = InstagramUserFactory()
+    client_class = APIClient
 
-        # Create source story with embedding
-        source_story = StoryFactory(
-            user=user,
-            embedding=[0.1, 0.2, 0.3] * 512,
+    @classmethod
+    def setUpTestData(cls):
+        """Create the user and source story shared by every test."""
+        cls.user = _insert_user(username="user1")
+        [cls.source_story] = _bulk_stories(cls.user, 1, embedding=_EMB)
+        cls.url = reverse(
+            "instagram:story_similar",
+            kwargs={"story_id": cls.source_story.story_id},
         )
+        cls.embedding_cache_key = f"story_unit_emb:{cls.source_story.story_id}"
+        cls.similar_ids_cache_key = f"story_sim_pk:{cls.source_story.story_id}"
+        cls.similar_ids_lock_key = f"story_sim_lock:{cls.source_story.story_id}"
 
-        # Create similar stories with embeddings
-        StoryFactory(
-            user=user,
-            embedding=[0.1, 0.2, 0.3] * 512,  # Very similar
-        )
-        StoryFactory(
-            user=user,
-            embedding=[0.5, 0.6, 0.7] * 512,  # Less similar
+    def setUp(self):
+        """Drop the source embedding, ranking and lock cached by an earlier test."""
+        cache.delete_many(
+            [
+                self.embedding_cache_key,
+                self.similar_ids_cache_key,
+                self.similar_ids_lock_key,
+            ],
         )
 
-        url = reverse(
-            "instagram:story_similar",
-            kwargs={"story_id": source_story.story_id},
-        )
-        response = self.client.get(url)
+    def test_similar_stories_success(self):
+        """Test successful retrieval of similar stories ordered by similarity."""
+        _bulk_stories(self.user, 1, embedding=_EMB)  # Very similar
+        _bulk_stories(self.user, 1, embedding=_EMB_ALT)  # Less similar
+
+        response = self.client.get(self.url)
 
         assert response.status_code == status.HTTP_200_OK
         assert "results" in response.data
         assert len(response.data["results"]) == 2  # noqa: PLR2004
 
-    def test_similar_stories_pagination(self):
-        """Test pagination works correctly for similar stories."""
-        user = InstagramUserFactory()
+    def test_similar_stories_ranked_by_direction_not_magnitude(self):
+        """Test that similarity ignores embedding length (cosine, not raw L2)."""
+        # Same direction as the source but five times longer, so further away
+        # in raw L2 than _EMB_ALT
+        [scaled] = _bulk_stories(self.user, 1, embedding=Vector([0.5, 1.0, 1.5] * 512))
+        _bulk_stories(self.user, 1, embedding=_EMB_ALT)
 
-        # Create source story with embedding
-        source_story = StoryFactory(
-            user=user,
-            embedding=[0.1, 0.2, 0.3] * 512,
-        )
+        results = _ok_results(self.client.get(self.url))
 
-        # Create 25 similar stories with embeddings
-        for _ in range(25):
-            StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
+        assert results[0]["story_id"] == scaled.story_id
 
-        url = reverse(
-            "instagram:story_similar",
-            kwargs={"story_id": source_story.story_id},
-        )
-        response = self.client.get(url)
+    def test_similar_stories_pagination(self):
+        """Test pagination works correctly for similar stories."""
+        _bulk_stories(self.user, 25, embedding=_EMB)
 
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 20  # noqa: PLR2004, Default page size
+        response = self.client.get(self.url)
+
+        assert len(_ok_results(response)) == 20  # noqa: PLR2004, Default page size
         assert response.data["next"] is not None
         assert "page=2" in response.data["next"]
 
     def test_similar_stories_custom_page_size(self):
         """Test custom page size parameter for similar stories."""
-        user = InstagramUserFactory()
+        _bulk_stories(self.user, 15, embedding=_EMB)
 
-        # Create source story with embedding
-        source_story = StoryFactory(
-            user=user,
-            embedding=[0.1, 0.2, 0.3] * 512,
-        )
-
-        # Create 15 similar stories with embeddings
-        for _ in range(15):
-            StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
+        response = self.client.get(self.url, {"page_size": 10})
 
-        url = reverse(
-            "instagram:story_similar",
-            kwargs={"story_id": source_story.story_id},
-        )
-        response = self.client.get(url, {"page_size": 10})
-
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 10  # noqa: PLR2004
+        assert len(_ok_results(response)) == 10  # noqa: PLR2004
 
     def test_similar_stories_max_page_size(self):
         """Test that max page size (100) is enforced."""
-        user = InstagramUserFactory()
-
-        # Create source story with embedding
-        source_story = StoryFactory(
-            user=user,
-            embedding=[0.1, 0.2, 0.3] * 512,
-        )
-
-        # Create 50 similar stories with embeddings
-        for _ in range(50):
-            StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
+        _bulk_stories(self.user, 50, embedding=_EMB)
 
-        url = reverse(
-            "instagram:story_similar",
-            kwargs={"story_id": source_story.story_id},
-        )
-        response = self.client.get(url, {"page_size": 200})  # Request more than max
+        # Request more than max
+        response = self.client.get(self.url, {"page_size": 200})
 
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 50  # noqa: PLR2004, Not exceeding available
+        assert len(_ok_results(response)) == 50  # noqa: PLR2004, Not exceeding available
 
     def test_similar_stories_excludes_source_story(self):
         """Test that the source story is excluded from results."""
-        user = InstagramUserFactory()
+        _bulk_stories(self.user, 1, embedding=_EMB)
 
-        # Create source story with embedding
-        source_story = StoryFactory(
-            user=user,
-            embedding=[0.1, 0.2, 0.3] * 512,
-        )
-
-        # Create similar stories with embeddings
-        StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
-
-        url = reverse(
-            "instagram:story_similar",
-            kwargs={"story_id": source_story.story_id},
-        )
-        response = self.client.get(url)
+        response = self.client.get(self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
 
         # Verify source story is not in results
         story_ids = [story["story_id"] for story in results]
-        assert source_story.story_id not in story_ids
+        assert self.source_story.story_id not in story_ids
 
     def test_similar_stories_only_with_embeddings(self):
         """Test that only stories with embeddings are returned."""
-        user = InstagramUserFactory()
-
-        # Create source story with embedding
-        source_story = StoryFactory(
-            user=user,
-            embedding=[0.1, 0.2, 0.3] * 512,
-        )
-
-        # Create stories with embeddings
-        story_with_embedding = StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
+        [story_with_embedding] = _bulk_stories(self.user, 1, embedding=_EMB)
 
         # Create stories without embeddings
-        StoryFactory(user=user, embedding=None)
-        StoryFactory(user=user, embedding=None)
+        _bulk_stories(self.user, 2, embedding=None)
 
-        url = reverse(
-            "instagram:story_similar",
-            kwargs={"story_id": source_story.story_id},
-        )
-        response = self.client.get(url)
+        response = self.client.get(self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
 
         # Only 1 story with embedding should be returned
         assert len(results) == 1
         assert results[0]["story_id"] == story_with_embedding.story_id
 
+    def test_similar_stories_limited_to_top_k(self):
+        """Test that only the top_k nearest stories are returned."""
+        nearest = _bulk_stories(self.user, 3, embedding=_EMB)
+        _bulk_stories(self.user, 3, embedding=_EMB_ALT)
+
+        with patch.object(StorySimilarView, "top_k", 3):
+            response = self.client.get(self.url)
+
+        data = _json(response)
+        assert data["count"] == 3  # noqa: PLR2004
+        assert {story["story_id"] for story in data["results"]} == {
+            story.story_id for story in nearest
+        }
+
     def test_similar_stories_story_not_found(self):
         """Test error response when source story doesn't exist."""
         url = reverse(
@@ -969,14 +1048,11 @@ class StorySimilarViewTest(TestCase):
 
     def test_similar_stories_no_embedding(self):
         """Test response when source story has no embedding."""
-        user = InstagramUserFactory()
-
         # Create source story without embedding
-        source_story = StoryFactory(user=user, embedding=None)
+        [source_story] = _bulk_stories(self.user, 1)
 
         # Create other stories with embeddings
-        StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
-        StoryFactory(user=user, embedding=[0.5, 0.6, 0.7] * 512)
+        _bulk_stories(self.user, 1, embedding=_EMB_ALT)
 
         url = reverse(
             "instagram:story_similar",
@@ -988,42 +1064,140 @@ class StorySimilarViewTest(TestCase):
         # Should return empty results
         assert len(response.data["results"]) == 0
 
-    def test_similar_stories_no_other_stories_with_embeddings(self):
-        """Test response when no other stories have embeddings."""
-        user = InstagramUserFactory()
+    def test_source_embedding_cached_between_requests(self):
+        """Test that a repeat request reuses the cached source embedding."""
+        _bulk_stories(self.user, 2, embedding=_EMB)
 
-        # Create source story with embedding
-        source_story = StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
+        self.client.get(self.url)
+        unit_embedding = cache.get(self.embedding_cache_key)
+        assert isinstance(unit_embedding, Vector)
+        assert math.isclose(math.hypot(*unit_embedding.to_list()), 1, rel_tol=1e-6)
 
-        # Create other stories without embeddings
-        StoryFactory(user=user, embedding=None)
-        StoryFactory(user=user, embedding=None)
+        # The source story lookup and the ranking are skipped on the second request
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        assert len(_ok_results(response)) == 2  # noqa: PLR2004
+
+    def test_similar_story_ids_cached_across_pages(self):
+        """Test that later pages reuse the cached ranking instead of re-ranking."""
+        _bulk_stories(self.user, 25, embedding=_EMB)
+
+        first_page = _ok_results(self.client.get(self.url))
+        [story_ids] = cache.get(self.similar_ids_cache_key)
+        assert len(story_ids) == 25  # noqa: PLR2004
+
+        # Only the page's stories with their users are queried
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {"page": 2})
+
+        second_page = _ok_results(response)
+        assert [story["story_id"] for story in first_page + second_page] == story_ids
+
+    def test_similar_story_ids_lock_released_after_ranking(self):
+        """Test that the ranking lock is released once the ids are cached."""
+        _bulk_stories(self.user, 2, embedding=_EMB)
+
+        self.client.get(self.url)
+
+        assert cache.get(self.similar_ids_cache_key) is not None
+        assert cache.get(self.similar_ids_lock_key) is None
+
+    def test_concurrent_request_waits_for_ranking(self):
+        """Test that a request for a story being ranked reuses that ranking."""
+        [winner_pick, _] = _bulk_stories(self.user, 2, embedding=_EMB)
+        cache.add(self.similar_ids_lock_key, value=True)
+
+        def finish_ranking(_seconds):
+            cache.set(self.similar_ids_cache_key, ([winner_pick.story_id],))
+
+        with patch("instagram.views.stories.time.sleep", side_effect=finish_ranking):
+            results = _ok_results(self.client.get(self.url))
 
+        assert [story["story_id"] for story in results] == [winner_pick.story_id]
+
+    def test_empty_ranking_cached(self):
+        """Test that a story without neighbours isn't re-ranked per request."""
+        self.client.get(self.url)
+
+        with patch.object(StorySimilarView, "rank_similar_story_ids") as mock_rank:
+            results = _ok_results(self.client.get(self.url))
+
+        assert results == []
+        mock_rank.assert_not_called()
+
+    def test_stops_waiting_when_lock_released_without_ranking(self):
+        """Test that a waiting request stops polling once the lock is gone."""
+        _bulk_stories(self.user, 1, embedding=_EMB)
+        cache.add(self.similar_ids_lock_key, value=True)
+
+        def release_lock(_seconds):
+            cache.delete(self.similar_ids_lock_key)
+
+        with patch(
+            "instagram.views.stories.time.sleep",
+            side_effect=release_lock,
+        ) as mock_sleep:
+            results = _ok_results(self.client.get(self.url))
+
+        assert len(results) == 1
+        mock_sleep.assert_called_once()
+
+    def test_ranks_itself_when_lock_holder_is_slow(self):
+        """Test that a waiting request ranks the story itself after the wait."""
+        _bulk_stories(self.user, 2, embedding=_EMB)
+        cache.add(self.similar_ids_lock_key, value=True)
+
+        with patch.object(StorySimilarView, "similar_ids_lock_wait", 0):
+            results = _ok_results(self.client.get(self.url))
+
+        assert len(results) == 2  # noqa: PLR2004
+        # The other request's lock is left alone
+        assert cache.get(self.similar_ids_lock_key) is True
+
+    def test_missing_source_embedding_not_cached(self):
+        """Test that a source story without an embedding isn't cached."""
+        [source_story] = _bulk_stories(self.user, 1)
         url = reverse(
             "instagram:story_similar",
             kwargs={"story_id": source_story.story_id},
         )
+
+        self.client.get(url)
+
+        assert cache.get(f"story_unit_emb:{source_story.story_id}") is None
+
+    def test_similar_stories_zero_embedding(self):
+        """Test that an all-zero source embedding returns no results."""
+        [source_story] = _bulk_stories(self.user, 1, embedding=Vector([0.0] * 1536))
+        _bulk_stories(self.user, 1, embedding=_EMB)
+        url = reverse(
+            "instagram:story_similar",
+            kwargs={"story_id": source_story.story_id},
+        )
+
         response = self.client.get(url)
 
+        assert _ok_results(response) == []
+        assert cache.get(f"story_unit_emb:{source_story.story_id}") is None
+
+    def test_similar_stories_no_other_stories_with_embeddings(self):
+        """Test response when no other stories have embeddings."""
+        # Create other stories without embeddings
+        _bulk_stories(self.user, 2, embedding=None)
+
+        response = self.client.get(self.url)
+
         assert response.status_code == status.HTTP_200_OK
         # Should return empty results
         assert len(response.data["results"]) == 0
 
     def test_similar_stories_response_structure(self):
         """Test that response structure matches expected format."""
-        user = InstagramUserFactory()
-
-        # Create source story with embedding
-        source_story = StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
-
         # Create similar stories
-        StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
+        _bulk_stories(self.user, 1, embedding=_EMB)
 
-        url = reverse(
-            "instagram:story_similar",
-            kwargs={"story_id": source_story.story_id},
-        )
-        response = self.client.get(url)
+        response = self.client.get(self.url)
 
         assert response.status_code == status.HTTP_200_OK
         assert "count" in response.data
@@ -1078,75 +1252,54 @@ class StorySimilarViewTest(TestCase):
 
     def test_similar_stories_unauthenticated_allowed(self):
         """Test unauthenticated access (IsAuthenticatedOrReadOnly)."""
-        user = InstagramUserFactory()
-
-        # Create source story with embedding
-        source_story = StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
+        _bulk_stories(self.user, 1, embedding=_EMB)
 
-        # Create similar stories
-        StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
-
-        url = reverse(
-            "instagram:story_similar",
-            kwargs={"story_id": source_story.story_id},
-        )
-        response = self.client.get(url)
+        response = self.client.get(self.url)
 
         assert response.status_code == status.HTTP_200_OK
 
     def test_similar_stories_page_navigation(self):
         """Test page navigation with page number pagination."""
-        user = InstagramUserFactory()
-
-        # Create source story with embedding
-        source_story = StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
-
-        # Create 25 similar stories
-        for _ in range(25):
-            StoryFactory(user=user, embedding=[0.1, 0.2, 0.3] * 512)
-
-        url = reverse(
-            "instagram:story_similar",
-            kwargs={"story_id": source_story.story_id},
-        )
+        _bulk_stories(self.user, 25, embedding=_EMB)
 
         # Get first page
-        response = self.client.get(url)
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 20  # noqa: PLR2004
+        response = self.client.get(self.url)
+        assert len(_ok_results(response)) == 20  # noqa: PLR2004
         assert response.data["next"] is not None
         assert response.data["previous"] is None
 
         # Get second page
-        response = self.client.get(url, {"page": 2})
-        assert response.status_code == status.HTTP_200_OK
-        assert len(response.data["results"]) == 5  # noqa: PLR2004, Remaining stories
+        response = self.client.get(self.url, {"page": 2})
+        assert len(_ok_results(response)) == 5  # noqa: PLR2004, Remaining stories
         assert response.data["next"] is None
         assert response.data["previous"] is not None
 
     def test_similar_stories_from_multiple_users(self):
         """Test that similar stories from different users are returned."""
-        user1 = InstagramUserFactory(username="user1")
-        user2 = InstagramUserFactory(username="user2")
-
-        # Create source story with embedding
-        source_story = StoryFactory(user=user1, embedding=[0.1, 0.2, 0.3] * 512)
+        user2 = _insert_user(username="user2")
 
         # Create similar stories from different users
-        StoryFactory(user=user1, embedding=[0.1, 0.2, 0.3] * 512)
-        StoryFactory(user=user2, embedding=[0.1, 0.2, 0.3] * 512)
+        _bulk_stories(self.user, 1, embedding=_EMB)
+        _bulk_stories(user2, 1, embedding=_EMB)
 
-        url = reverse(
-            "instagram:story_similar",
-            kwargs={"story_id": source_story.story_id},
-        )
-        response = self.client.get(url)
+        response = self.client.get(self.url)
 
-        assert response.status_code == status.HTTP_200_OK
-        results = response.data["results"]
+        results = _ok_results(response)
         assert len(results) == 2  # noqa: PLR2004
 
         # Verify we have stories from both users
         usernames = {story["user"]["username"] for story in results}
         assert "user1" in usernames
         assert "user2" in usernames
+
+    def test_query_count_does_not_grow_with_users(self):
+        """Test that similar stories and their users load in fixed queries."""
+        for i in range(5):
+            _bulk_stories(_insert_user(username=f"user{i + 2}"), 2, embedding=_EMB)
+
+        # Source story, ef_search setting, top-K ids and page stories joined
+        # with their users, inside the request's savepoint
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+
+        assert len(_ok_results(response)) == 10  # noqa: PLR2004
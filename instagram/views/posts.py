@@ -45,12 +45,9 @@ class PostListView(ListAPIView):
     ordering = "-post_created_at"
 
     def get_queryset(self):
-        # Annotate users with has_stories and has_history
+        # Annotate users with has_stories; has_history is a column
         annotated_users = InstagramUser.objects.annotate(
             has_stories=Exists(Story.objects.filter(user=OuterRef("pk"))),
-            has_history=Exists(
-                InstagramUser.history.model.objects.filter(uuid=OuterRef("pk")),
-            ),
         )
 
         # Order PostMedia by reference to ensure consistent ordering
@@ -74,12 +71,9 @@ class PostDetailView(RetrieveAPIView):
     lookup_field = "id"
 
     def get_queryset(self):
-        # Annotate users with has_stories and has_history
+        # Annotate users with has_stories; has_history is a column
         annotated_users = InstagramUser.objects.annotate(
             has_stories=Exists(Story.objects.filter(user=OuterRef("pk"))),
-            has_history=Exists(
-                InstagramUser.history.model.objects.filter(uuid=OuterRef("pk")),
-            ),
         )
 
         # Order PostMedia by created_at to ensure consistent ordering
@@ -131,12 +125,9 @@ class PostAISearchView(ListAPIView):
             # Return empty queryset if no search query provided
             return Post.objects.none()
 
-        # Annotate users with has_stories and has_history
+        # Annotate users with has_stories; has_history is a column
         annotated_users = InstagramUser.objects.annotate(
             has_stories=Exists(Story.objects.filter(user=OuterRef("pk"))),
-            has_history=Exists(
-                InstagramUser.history.model.objects.filter(uuid=OuterRef("pk")),
-            ),
         )
 
         # Order PostMedia by reference to ensure consistent ordering
@@ -204,12 +195,9 @@ class PostSimilarView(ListAPIView):
         if source_post.embedding is None:
             return Post.objects.none()
 
-        # Annotate users with has_stories and has_history
+        # Annotate users with has_stories; has_history is a column
         annotated_users = InstagramUser.objects.annotate(
             has_stories=Exists(Story.objects.filter(user=OuterRef("pk"))),
-            has_history=Exists(
-                InstagramUser.history.model.objects.filter(uuid=OuterRef("pk")),
-            ),
         )
 
         # Order PostMedia by reference to ensure consistent ordering
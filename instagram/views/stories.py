@@ -1,31 +1,72 @@
+import functools
 import hashlib
-import json
+import time
 
 from django.core.cache import cache
-from django.db.models import Exists
-from django.db.models import OuterRef
-from django.db.models import Prefetch
+from django.db import connection
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import When
+from django.http import HttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
 from drf_spectacular.utils import OpenApiResponse
 from drf_spectacular.utils import extend_schema
-from pgvector.django import L2Distance
+from pgvector import Vector
+from pgvector.django import MaxInnerProduct
 from rest_framework import filters
 from rest_framework.generics import ListAPIView
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 
 from core.utils.view_tracking import get_client_ip
 from core.utils.view_tracking import should_count_view
 from instagram.models import Story
 from instagram.models import User as InstagramUser
+from instagram.models.story import L2Normalize
+from instagram.models.story import unit_halfvec_embedding
 from instagram.paginations import StoryCursorPagination
 from instagram.paginations import StorySimilarPageNumberPagination
 from instagram.serializers.stories import StoryDetailSerializer
+from instagram.serializers.stories import StoryListCompactSerializer
 from instagram.serializers.stories import StoryListSerializer
+from instagram.serializers.users import InstagramUserCompactSerializer
+from instagram.serializers.users import InstagramUserListSerializer
 from instagram.tasks.story import increment_story_view_count
 
 
+def _user_fields(*excluded):
+    """Paths to the joined user's columns, minus those its serializer excludes."""
+    return [
+        f"user__{field.name}"
+        for field in InstagramUser._meta.concrete_fields  # noqa: SLF001
+        if field.name not in excluded
+    ]
+
+
+@functools.lru_cache(maxsize=1024)
+def _story_list_cache_key(query_string):
+    """
+    Return the story list cache key for a raw query string. Memoized, since
+    most requests repeat a handful of listings.
+    """
+    # Sort the raw, still percent-encoded pairs by name so parameter order
+    # doesn't matter; the sort is stable, keeping repeated values of one name
+    # in order since filters read the last. Encoded "&" and "=" keep distinct
+    # queries distinct
+    params_key = "&".join(
+        sorted(query_string.split("&"), key=lambda pair: pair.partition("=")[0]),
+    )
+    digest = hashlib.blake2b(
+        params_key.encode(),
+        digest_size=12,
+        usedforsecurity=False,
+    ).hexdigest()
+    return "story_list_json_" + digest
+
+
 class StoryListView(ListAPIView):
     queryset = Story.objects.all().order_by("-created_at")
     serializer_class = StoryListSerializer
@@ -36,20 +77,41 @@ class StoryListView(ListAPIView):
     search_fields = ["user__username", "user__full_name", "user__biography"]
     filterset_fields = ["user"]
 
-    def get_queryset(self):
-        # Annotate users with has_stories and has_history, defer unused heavy fields
-        annotated_users = InstagramUser.objects.defer(
-            "original_profile_picture_url",
-            "raw_api_data",
-        ).annotate(
-            has_stories=Exists(Story.objects.filter(user=OuterRef("pk"))),
-            has_history=Exists(
-                InstagramUser.history.model.objects.filter(uuid=OuterRef("pk")),
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "compact",
+                OpenApiTypes.BOOL,
+                description=(
+                    "Return only uuid, username and profile_picture for each "
+                    "story's user."
+                ),
             ),
-        )
+        ],
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
+    def is_compact(self):
+        return self.request.query_params.get("compact", "").lower() in {"1", "true"}
+
+    def get_serializer_class(self):
+        if self.is_compact():
+            return StoryListCompactSerializer
+        return StoryListSerializer
+
+    def get_queryset(self):
+        # Join users, loading only serialized columns; the full serializer
+        # fills in their has_stories flag
+        if self.is_compact():
+            user_fields = [
+                f"user__{field}" for field in InstagramUserCompactSerializer.Meta.fields
+            ]
+        else:
+            user_fields = _user_fields(*InstagramUserListSerializer.Meta.exclude)
         return (
-            Story.objects.only(
+            Story.objects.select_related("user")
+            .only(
                 "story_id",
                 "user_id",
                 "thumbnail",
@@ -58,27 +120,27 @@ class StoryListView(ListAPIView):
                 "is_flagged",
                 "created_at",
                 "story_created_at",
-            )
-            .prefetch_related(
-                Prefetch("user", queryset=annotated_users),
+                *user_fields,
             )
             .order_by("-created_at")
         )
 
     def list(self, request, *args, **kwargs):
-        """List stories with 30-second caching per unique query param combination."""
-        params = dict(request.query_params)
-        params_key = json.dumps(sorted(params.items()), sort_keys=True)
-        md5_hash = hashlib.md5(params_key.encode(), usedforsecurity=False).hexdigest()
-        cache_key = "story_list_" + md5_hash
-
-        cached_response = cache.get(cache_key)
-        if cached_response is not None:
-            return Response(cached_response)
-
-        response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data, 30)
-        return response
+        """
+        List stories with 30-second caching of the rendered JSON per unique
+        query param combination, served on a hit without serializing again.
+        """
+        # Only JSON is cached; the browsable API renders every request
+        if request.accepted_renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+
+        cache_key = _story_list_cache_key(request.META.get("QUERY_STRING", ""))
+        content = cache.get(cache_key)
+        if content is None:
+            response = super().list(request, *args, **kwargs)
+            content = JSONRenderer().render(response.data)
+            cache.set(cache_key, content, 30)
+        return HttpResponse(content, content_type="application/json")
 
 
 class StoryDetailView(RetrieveAPIView):
@@ -88,16 +150,11 @@ class StoryDetailView(RetrieveAPIView):
     lookup_field = "story_id"
 
     def get_queryset(self):
-        # Annotate users with has_stories and has_history
-        annotated_users = InstagramUser.objects.annotate(
-            has_stories=Exists(Story.objects.filter(user=OuterRef("pk"))),
-            has_history=Exists(
-                InstagramUser.history.model.objects.filter(uuid=OuterRef("pk")),
-            ),
-        )
-
-        return Story.objects.all().prefetch_related(
-            Prefetch("user", queryset=annotated_users),
+        # Join users, deferring unused heavy fields; the serializer fills in
+        # their has_stories flag
+        return Story.objects.select_related("user").defer(
+            "user__raw_api_data",
+            "user__view_count",
         )
 
     def retrieve(self, request, *args, **kwargs):
@@ -109,7 +166,22 @@ class StoryDetailView(RetrieveAPIView):
 
 
 class StorySimilarView(ListAPIView):
-    """Get similar stories based on embedding similarity using L2Distance."""
+    """Get similar stories based on cosine similarity of their embeddings."""
+
+    # Nearest neighbours returned, re-ranked from a larger shortlist read off
+    # the half-precision HNSW index
+    top_k = 100
+    candidate_k = 200
+    # Seconds a source story's embedding stays cached between requests
+    source_embedding_cache_timeout = 300
+    # Seconds a source story's ranked neighbour ids stay cached, so paging
+    # through them runs the ANN search once
+    similar_ids_cache_timeout = 300
+    # Seconds a request ranking a story holds its lock at most, and seconds
+    # concurrent requests for that story wait for its result before ranking
+    # it themselves
+    similar_ids_lock_timeout = 10
+    similar_ids_lock_wait = 1
 
     serializer_class = StoryListSerializer
     pagination_class = StorySimilarPageNumberPagination
@@ -118,8 +190,9 @@ class StorySimilarView(ListAPIView):
     @extend_schema(
         summary="Get similar stories",
         description=(
-            "Retrieve stories similar to the specified story based on embedding "
-            "similarity using L2Distance. Only returns stories that have embeddings."
+            "Retrieve stories similar to the specified story based on cosine "
+            "similarity of their embeddings. Only returns stories that have "
+            "embeddings, limited to the 100 nearest."
         ),
         responses={
             200: StoryListSerializer(many=True),
@@ -129,37 +202,169 @@ class StorySimilarView(ListAPIView):
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
-    def get_queryset(self):
-        # Get the story ID from URL parameter
+    def get_unit_embedding(self):
+        """
+        Return the source story's embedding scaled to unit length, or None if
+        it has no embedding yet. Memoized on the view and cached per story, so
+        repeat requests skip the lookup. Raises Story.DoesNotExist for an
+        unknown story.
+        """
+        if hasattr(self, "_unit_embedding"):
+            return self._unit_embedding
+
         story_id = self.kwargs.get("story_id")
+        cache_key = f"story_unit_emb:{story_id}"
+        unit_embedding = cache.get(cache_key)
+        if unit_embedding is None:
+            # pgvector scales the embedding in one C loop over the float32
+            # array instead of one Python division per element
+            unit_embedding = (
+                Story.objects.filter(story_id=story_id)
+                .values_list(L2Normalize("embedding"), flat=True)
+                .get()
+            )
+            # Missing embeddings aren't cached so a freshly generated one is
+            # picked up on the next request. An all-zero embedding comes back
+            # as zeros and has no direction to rank by.
+            if unit_embedding is None or not any(unit_embedding):
+                unit_embedding = None
+            else:
+                # On unit vectors L2 and cosine ranking reduce to the inner
+                # product. A Vector is a flat float32 buffer, which pickles to
+                # half the size of a list of floats and is passed to the
+                # distance functions without another conversion.
+                unit_embedding = Vector(unit_embedding)
+                cache.set(
+                    cache_key,
+                    unit_embedding,
+                    self.source_embedding_cache_timeout,
+                )
+
+        self._unit_embedding = unit_embedding
+        return unit_embedding
+
+    def get_similar_story_ids(self):
+        """
+        Return the ids of the top_k stories nearest to the source story, most
+        similar first, or None if it has no embedding yet. Cached per story,
+        so later pages reuse the ranking and concurrent requests share a
+        single search. Raises Story.DoesNotExist for an unknown story.
+        """
+        story_id = self.kwargs.get("story_id")
+        cache_key = f"story_sim_pk:{story_id}"
+        # Cached wrapped in a tuple, since some backends read a cached empty
+        # list back as a miss
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached[0]
+
+        # Coalesce concurrent misses: only the request taking the lock runs the
+        # ANN search while the others poll for its result. They poll before
+        # looking up the source embedding, so a waiter hasn't queried yet and
+        # doesn't hold a pooled connection in the request's transaction while
+        # it sleeps; only an authenticated request's user lookup may have.
+        lock_key = f"story_sim_lock:{story_id}"
+        locked = cache.add(lock_key, value=True, timeout=self.similar_ids_lock_timeout)
+        if not locked:
+            deadline = time.monotonic() + self.similar_ids_lock_wait
+            while time.monotonic() < deadline:
+                time.sleep(0.01)
+                polled = cache.get_many([cache_key, lock_key])
+                if cache_key in polled:
+                    return polled[cache_key][0]
+                # The lock holder finished without caching a ranking, e.g. the
+                # source story has no embedding, so stop waiting for one
+                if lock_key not in polled:
+                    break
 
-        # Get the source story and its embedding
         try:
-            source_story = Story.objects.get(story_id=story_id)
+            unit_embedding = self.get_unit_embedding()
+            if unit_embedding is None:
+                return None
+            story_ids = self.rank_similar_story_ids(unit_embedding)
+            cache.set(cache_key, (story_ids,), self.similar_ids_cache_timeout)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return story_ids
+
+    def rank_similar_story_ids(self, unit_embedding):
+        """Run the ANN search for the top_k stories nearest to the source."""
+        story_id = self.kwargs.get("story_id")
+
+        # Shortlist candidates by walking the unit-length half-precision HNSW
+        # index, which needs the raw distance in ORDER BY
+        candidates = (
+            Story.objects.filter(embedding__isnull=False)
+            .exclude(story_id=story_id)  # Exclude the source story itself
+            .order_by(
+                MaxInnerProduct(unit_halfvec_embedding(), unit_embedding),
+            )
+            .values("pk")[: self.candidate_k]
+        )
+
+        # Re-rank the shortlist by exact float32 similarity. Compiles to one
+        # statement, the shortlist a subquery driven by the HNSW index scan.
+        ranked = (
+            Story.objects.filter(pk__in=candidates)
+            .order_by(MaxInnerProduct(L2Normalize("embedding"), unit_embedding))
+            .values_list("pk", flat=True)
+        )
+        # A local setting lasts until the transaction ends, which a savepoint
+        # wouldn't shorten, so only begin one outside the request's transaction
+        with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+            # An HNSW scan returns at most ef_search rows, 40 by default
+            cursor.execute(
+                "SELECT set_config('hnsw.ef_search', %s, true)",
+                [str(self.candidate_k)],
+            )
+            return list(ranked[: self.top_k])
+
+    def get_queryset(self):
+        try:
+            story_ids = self.get_similar_story_ids()
         except Story.DoesNotExist:
             return Story.objects.none()
 
-        # If source story has no embedding, return empty queryset
-        if source_story.embedding is None:
+        # If source story has no embedding or no neighbours, return empty queryset
+        if not story_ids:
             return Story.objects.none()
+        self._similar_story_ids = story_ids
 
-        # Annotate users with has_stories and has_history
-        annotated_users = InstagramUser.objects.annotate(
-            has_stories=Exists(Story.objects.filter(user=OuterRef("pk"))),
-            has_history=Exists(
-                InstagramUser.history.model.objects.filter(uuid=OuterRef("pk")),
-            ),
-        )
-
-        # Find similar stories using L2Distance
+        # Keep the cached ranking; pagination then only loads the page's rows
+        # out of the top K instead of re-ranking every story per page
         return (
-            Story.objects.filter(embedding__isnull=False)
-            .exclude(story_id=story_id)  # Exclude the source story itself
-            .prefetch_related(
-                Prefetch("user", queryset=annotated_users),
+            Story.objects.select_related("user")
+            .only(
+                "story_id",
+                "user_id",
+                "thumbnail",
+                "blur_data_url",
+                "media",
+                "is_flagged",
+                "created_at",
+                "story_created_at",
+                *_user_fields(*InstagramUserListSerializer.Meta.exclude),
             )
-            .annotate(
-                similarity_score=1 - L2Distance("embedding", source_story.embedding),
+            .filter(pk__in=story_ids)
+            .order_by(
+                Case(
+                    *[
+                        When(pk=pk, then=position)
+                        for position, pk in enumerate(story_ids)
+                    ],
+                ),
             )
-            .order_by("-similarity_score")
         )
+
+    def paginate_queryset(self, queryset):
+        """
+        Paginate the ranked ids rather than the queryset, so the page count
+        comes from the list instead of a COUNT query, then load only the
+        page's stories.
+        """
+        story_ids = getattr(self, "_similar_story_ids", [])
+        page_ids = super().paginate_queryset(story_ids)
+        if page_ids is None:
+            return None
+        return list(queryset.filter(pk__in=page_ids))
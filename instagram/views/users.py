@@ -53,9 +53,6 @@ class InstagramUserListCreateView(ListCreateAPIView):
             .prefetch_related("story_set")
             .annotate(
                 has_stories=Exists(Story.objects.filter(user=OuterRef("pk"))),
-                has_history=Exists(
-                    InstagramUser.history.model.objects.filter(uuid=OuterRef("pk")),
-                ),
             )
         )
 
@@ -117,9 +114,6 @@ class InstagramUserDetailView(RetrieveAPIView):
             .prefetch_related("story_set")
             .annotate(
                 has_stories=Exists(Story.objects.filter(user=OuterRef("pk"))),
-                has_history=Exists(
-                    InstagramUser.history.model.objects.filter(uuid=OuterRef("pk")),
-                ),
             )
         )
 